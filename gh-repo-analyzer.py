@@ -8,16 +8,27 @@ import re
 import base64
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from dataclasses import dataclass
+from collections import Counter, defaultdict, deque, namedtuple
+from typing import Dict, List, Optional, Any, Tuple
 import sys
 import time
 import platform
+import textwrap
 import threading
+import atexit
+import calendar
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import json
+import hashlib
+import operator
+import tempfile
+from urllib.parse import quote
+import diskcache
 from dotenv import load_dotenv
 from github import Github, Repository, GithubException
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 import argparse
 
 # Configure logging
@@ -34,6 +45,77 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Initialize OpenAI client (new SDK 1.0+)
 client = OpenAI(api_key=OPENAI_API_KEY)
+OPENAI_MODEL = "gpt-4-turbo"  # Using GPT-4 for better code analysis
+# Stable instructions sent as the system message. Everything that varies per repository goes in the
+# user message after it, so the provider can reuse this prefix across calls (prompt caching needs a
+# prefix of at least 1024 tokens). Do not interpolate per-run values such as dates into this text.
+SYSTEM_PROMPT = """You are a technical expert with deep knowledge of software development, programming languages, and system architecture. Your task is to analyze project information and provide definitive, authoritative assessments based on code analysis. Use confident, assertive language without hedging terms like 'appears to be', 'likely', 'suggests', 'potentially', 'indicates', etc. Make definitive statements about what the project is and does.
+
+You will receive information about one software project collected automatically from its source code hosting account. Based on that information, make definitive statements about the project's purpose, technologies, and functionality. Focus on analyzing the code, file names, and structure rather than just descriptions.
+
+The project information is given in the user message with the following sections, always in this order:
+- Project Name: the name of the project as it appears in the account.
+- Created On: the date the project was created, formatted as YYYY-MM-DD.
+- Languages: the programming languages inferred from the file extension counts, most files first; only when no extension is recognized, the languages reported by the hosting service.
+- Frameworks and Libraries: one line per ecosystem, listing the dependencies declared in manifest files such as package.json, requirements.txt, composer.json, pyproject.toml, Gemfile, pom.xml, build.gradle, go.mod, Cargo.toml, .csproj and pubspec.yaml.
+- Code Analysis: the total number of files, the total number of lines of code in source files under 100 KB (counted exactly for the downloaded files and estimated from file size for the rest), and the three most common file types.
+- Detailed File Types: every file extension found with its file count.
+- File Structure Overview: a partial listing of directory and file paths in tree order; directory paths end with '/'.
+- Code samples: for a few source files per extension, each preceded by its path: the top-level imports, classes and functions of Python, JavaScript and TypeScript files, or the first lines of other files, with blank lines removed.
+- README Excerpt: the beginning of the README file, or "No README available".
+
+How to analyze the information:
+1. Start from the code samples and file names. Entry points (main files, index files, app or server modules, command line scripts, notebooks), route or controller definitions, models, and configuration files describe what the project actually does far more reliably than its README.
+2. Use the dependency lists to identify frameworks, runtimes, databases, cloud services, and tooling. Name a technology only if it is present in the languages, dependencies, file types, structure, or code samples.
+3. Use the README to confirm the purpose of the project and to learn its domain vocabulary, but do not copy marketing text or installation instructions into your answer.
+4. Use the file structure to describe the architecture: how the code is split into modules, layers, services, packages, or components, and how they interact.
+5. If information is missing (for example, no README or no code samples), rely on the remaining sections and still give a definitive answer.
+
+Description of each field of the answer:
+- name: the project name exactly as given in the Project Name section.
+- year: the four-digit year from the Created On section, as a number.
+- purpose: a detailed, specific description of what this project does and its main purpose, in two to four sentences. Use assertive language and avoid using the word 'repository'. Mention the problem it solves, who or what it is for, and the main way it does so.
+- technologies: the key languages, frameworks, libraries, platforms, and services used, most important first, each as a short proper name (for example "Python", "React", "PostgreSQL", "Docker"). Do not include generic words such as "code" or "scripts".
+- features: the main features or capabilities of the project, each as a short phrase starting with a noun or verb. List three to seven features.
+- architecture: a definitive description of the project's architecture or structure in one to three sentences.
+- complexity: a confident assessment of the project's technical complexity, exactly one of Low, Medium, or High.
+
+Guidelines for the complexity rating:
+- Low: small scripts, exercises, static pages, simple single-purpose tools, or projects with only a handful of source files and no meaningful internal structure.
+- Medium: complete applications with several modules, a framework, persistence or external APIs, and a clear separation of concerns.
+- High: systems with multiple components or services, non-trivial algorithms (for example robotics, compilers, machine learning, distributed systems, embedded firmware), concurrency, or substantial infrastructure.
+
+Based on the code samples, file names, and project structure, provide a definitive analysis of this project. Make authoritative statements about what the project does, how it works, and its purpose. Do not use hedging language like "appears to be", "likely", "suggests", "potentially", "indicates", etc. Instead, use confident, assertive language with definitive statements.
+
+Respond with a JSON object in the following format:
+{
+  "name": "Project name",
+  "year": 2024,
+  "purpose": "A definitive description of what this project does and its main purpose. Use assertive language and avoid using the word 'repository'.",
+  "technologies": ["List", "of", "key", "technologies", "used"],
+  "features": ["List", "of", "main", "features", "or", "capabilities"],
+  "architecture": "Definitive description of the project's architecture or structure",
+  "complexity": "Confident assessment of the project's technical complexity (Low, Medium, High)"
+}
+
+Ensure your response is valid JSON with exactly these keys. Make your purpose description detailed, specific, and assertive, focusing on what the project actually does rather than generic descriptions. Do not use hedging language - be confident and definitive in your analysis."""
+
+# Upper bounds on concurrent requests to each API
+GITHUB_MAX_CONCURRENCY = 10
+OPENAI_MAX_CONCURRENCY = 4
+OPENAI_RATE_LIMIT_RETRIES = 5
+openai_semaphore = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+
+# Directory holding full repository analyses keyed by default branch commit
+ANALYSIS_CACHE_DIR = os.path.expanduser(os.path.join("~", ".cache", "gh-analyzer"))
+
+# ETags of fetched files, keyed by "owner/repo:path", and their decoded contents keyed by blob SHA.
+# Conditional requests for unchanged files return 304 without a body or a rate limit charge.
+ETAG_STORE_PATH = os.path.join(ANALYSIS_CACHE_DIR, "etags.json")
+blob_store = diskcache.Cache(os.path.join(ANALYSIS_CACHE_DIR, "blobs"))
+
+# On-disk cache of OpenAI summaries, keyed by a hash of the exact request
+summary_cache = diskcache.Cache(".oai_cache")
 
 # Determine if we're on Windows
 IS_WINDOWS = platform.system() == 'Windows'
@@ -42,48 +124,37 @@ IS_WINDOWS = platform.system() == 'Windows'
 if IS_WINDOWS:
     import msvcrt
 else:
-    import select
     import termios
     import tty
 
-# Global variable to track skip request
-skip_current_repo = False
-skip_lock = threading.Lock()
+# Set by the key listener when the current repository should be skipped
+skip_event = threading.Event()
 
 def key_listener_thread():
     """Background thread that listens for 'S' key press to skip current repository."""
-    global skip_current_repo
-    
     try:
+        if IS_WINDOWS:
+            read_key = lambda: msvcrt.getwch().lower()  # Blocks until a key is pressed
+        else:
+            # Switch the terminal to cbreak mode once, so single key presses are delivered without Enter
+            fd = sys.stdin.fileno()
+            old_settings = termios.tcgetattr(fd)
+            atexit.register(termios.tcsetattr, fd, termios.TCSADRAIN, old_settings)
+            tty.setcbreak(fd)
+            read_key = lambda: os.read(fd, 1)  # Blocks until input
+
         while True:
-            key = None
-            
-            # Platform-specific key detection
-            if IS_WINDOWS:
-                if msvcrt.kbhit():
-                    key = msvcrt.getch().decode('utf-8').lower()
-            else:
-                # Unix implementation
-                old_settings = None
-                try:
-                    fd = sys.stdin.fileno()
-                    old_settings = termios.tcgetattr(fd)
-                    tty.setraw(fd)
-                    
-                    if select.select([sys.stdin], [], [], 0.1)[0]:
-                        key = sys.stdin.read(1).lower()
-                finally:
-                    # Restore terminal settings
-                    if old_settings:
-                        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-            
+            key = read_key()
+            if not key:
+                break  # stdin was closed
+            if isinstance(key, bytes):
+                # Decode after the EOF check: a lone byte of a multi-byte character decodes to ''
+                key = key.decode('utf-8', errors='ignore').lower()
+
             # Check if 'S' was pressed
             if key == 's':
-                with skip_lock:
-                    skip_current_repo = True
-                    print("\nSkip requested. Will skip current repository when possible...")
-            
-            time.sleep(0.1)  # Small sleep to prevent CPU hogging
+                skip_event.set()
+                print("\nSkip requested. Will skip current repository when possible...")
     except Exception as e:
         print(f"\nKey listener thread error: {e}")
         # Continue without key listening if there's an error
@@ -103,16 +174,185 @@ FRAMEWORK_PATTERNS = {
     "pubspec.yaml": {"type": "yaml", "framework": "Dart/Flutter"}
 }
 
+# Package name at the start of each non-comment requirements.txt line
+REQ_LINE = re.compile(r'^(?![ \t]*#)[ \t]*([A-Za-z0-9][A-Za-z0-9_.\-]*)', re.MULTILINE)
+
+# Top-level directories left out of the code analysis
+SKIP_DIRS = frozenset({'.git', 'node_modules', 'venv', '.venv', '__pycache__', 'dist', 'build'})
+
+# File extensions whose content is fetched for line counts and code samples
+SOURCE_EXTS = frozenset({'.py', '.js', '.java', '.c', '.cpp', '.h', '.cs', '.php', '.rb', '.go', '.ts', '.html',
+                         '.css', '.sql'})
+
+# Language of each common source file extension, used instead of the languages API
+EXTENSION_LANGUAGES = {
+    '.py': 'Python', '.ipynb': 'Jupyter Notebook', '.js': 'JavaScript', '.jsx': 'JavaScript', '.mjs': 'JavaScript',
+    '.ts': 'TypeScript', '.tsx': 'TypeScript', '.java': 'Java', '.kt': 'Kotlin', '.scala': 'Scala',
+    '.c': 'C', '.h': 'C', '.cpp': 'C++', '.cc': 'C++', '.hpp': 'C++', '.cs': 'C#', '.go': 'Go',
+    '.rs': 'Rust', '.rb': 'Ruby', '.php': 'PHP', '.swift': 'Swift', '.m': 'Objective-C', '.dart': 'Dart',
+    '.lua': 'Lua', '.pl': 'Perl', '.r': 'R', '.sh': 'Shell', '.sql': 'SQL', '.html': 'HTML', '.css': 'CSS',
+    '.scss': 'SCSS', '.vue': 'Vue'
+}
+
+# File extensions left out of the code analysis
+SKIP_EXTS = frozenset({'.pyc', '.pyo', '.min.js', '.min.css', '.map', '.log', '.md'})
+
+# Code samples kept per file extension; only this many files per extension are downloaded
+MAX_SAMPLES_PER_EXT = 5
+
+# Source files larger than this are not downloaded for code samples
+MAX_SAMPLE_FILE_SIZE = 100000
+
+# Files listed before a directory walk stops early, once every extension seen has all of its code samples
+MAX_SCANNED_FILES = 5000
+
+# Maximum number of directories and files listed in the structure overview
+MAX_STRUCTURE_ENTRIES = 50
+
+# Limits on how much of the code analysis is sent to OpenAI
+MAX_PROMPT_STRUCTURE_ENTRIES = 20
+MAX_README_CHARS = 800
+MAX_DIGEST_LINES = 40
+MAX_SAMPLE_CHARS = 500
+
+# First line of a text containing anything but whitespace
+FIRST_TEXT_LINE = re.compile(r'^.*\S.*$', re.MULTILINE)
+
+# Runs of blank lines, collapsed in code samples sent to OpenAI
+BLANK_LINES = re.compile(r'\n(?:[ \t]*\n)+')
+
+# Top-level declarations kept in code digests, by file extension
+PY_DIGEST = re.compile(r'^(?:def |async def |class |import |from ).*$', re.MULTILINE)
+JS_DIGEST = re.compile(r'^(?:import |export |function |async function |class |const \S+\s*=.*=>).*$', re.MULTILINE)
+DIGEST_PATTERNS = {'.py': PY_DIGEST, '.js': JS_DIGEST, '.ts': JS_DIGEST}
+
+# Average source line length used to estimate line counts of files that are not downloaded
+AVG_BYTES_PER_LINE = 40
+
+README_NAMES = ["README.md", "README.MD", "Readme.md", "readme.md", "README", "readme"]
+
+# Files probed for every repository, fetched together in one GraphQL query
+CANDIDATE_FILES = README_NAMES + list(FRAMEWORK_PATTERNS.keys())
+
+
+def make_digest(ext: str, text: str) -> Optional[str]:
+    """Extract the top-level imports and definitions of a source file, or None if its type is not supported."""
+    pattern = DIGEST_PATTERNS.get(ext)
+    if pattern is None:
+        return None
+    lines = []
+    for match in pattern.finditer(text):
+        lines.append(match.group(0).rstrip())
+        if len(lines) >= MAX_DIGEST_LINES:
+            break
+    return '\n'.join(lines) or None
+
+
+def _atomic_write(path: str, text: str):
+    """Write text to a file in the cache directory, replacing it atomically."""
+    os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=ANALYSIS_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+# A file or directory of a repository, as listed by the Git Tree API
+TreeEntry = namedtuple('TreeEntry', ['path', 'type', 'size', 'sha'])
+
+
+class RateLimiter:
+    """Paces GitHub API calls using the rate limit reported in the latest response headers."""
+
+    def __init__(self, github: Github, min_remaining: int = 50):
+        self.github = github
+        self.min_remaining = min_remaining
+
+    def core_rate_limit(self) -> Tuple[int, float]:
+        """Return the remaining REST requests and the time their window resets, asked from the API itself."""
+        overview = self.github.get_rate_limit()  # Not counted against the rate limit
+        # PyGithub 2 nests the budgets under resources; 1.x exposes them directly
+        core = getattr(overview, 'resources', overview).core
+        # The reset time is in UTC, naive in older PyGithub releases
+        return core.remaining, calendar.timegm(core.reset.utctimetuple())
+
+    def wait(self):
+        """Sleep until the rate limit resets if too few requests remain in the current window."""
+        # PyGithub keeps the headers of the latest response, which may report the separate GraphQL budget
+        remaining, _ = self.github.rate_limiting
+        if 0 <= remaining < self.min_remaining:
+            # Confirm against the REST budget before sleeping on a possibly unrelated reset time
+            remaining, reset = self.core_rate_limit()
+            if remaining >= self.min_remaining:
+                return
+            delay = reset - time.time()
+            if delay > 0:
+                logger.warning(f"GitHub rate limit nearly exhausted ({remaining} left), sleeping {delay:.0f}s until reset")
+                time.sleep(delay + 1)
+
+    def retry_after(self, e: GithubException) -> Optional[float]:
+        """Return how long to wait before retrying a rate limited request, or None if it was not rate limited."""
+        if e.status not in (403, 429):
+            return None
+        headers = getattr(e, 'headers', None) or {}
+        if 'retry-after' in headers:
+            return float(headers['retry-after'])
+        if headers.get('x-ratelimit-remaining') == '0' and 'x-ratelimit-reset' in headers:
+            return max(0.0, float(headers['x-ratelimit-reset']) - time.time()) + 1
+        return None
+
+    def call(self, func, *args, **kwargs):
+        """Call a PyGithub function, waiting out the rate limit and retrying once if it was hit."""
+        self.wait()
+        try:
+            return func(*args, **kwargs)
+        except GithubException as e:
+            delay = self.retry_after(e)
+            if delay is None:
+                raise
+            logger.warning(f"GitHub rate limit hit, retrying in {delay:.0f}s")
+            time.sleep(delay)
+            return func(*args, **kwargs)
+
+
+@dataclass
+class SummaryContext:
+    """Strings derived from repository data, shared by the OpenAI prompt and the fallback summary."""
+    languages: str
+    frameworks_list: List[str]
+    frameworks_str: str
+    readme_excerpt: str
+    readme_snippet: str
+    file_types_str: str
+    code_samples_text: str
+    structure_text: str
+    total_files: int
+    total_lines: int
+    main_file_types: List[str]
+
 
 class GitHubRepoAnalyzer:
     def __init__(self, github_token: str):
-        self.github = Github(github_token)
+        # Request the largest page size so listing repositories takes as few calls as possible
+        self.github = Github(github_token, per_page=100)
+        self.rate_limiter = RateLimiter(self.github)
         self.user = self.github.get_user()
+        # File contents fetched during this run, keyed by (repo full name, path)
+        self._content_cache: Dict[tuple, Optional[str]] = {}
+        # Shared pool for fetching file contents concurrently; also bounds concurrent GitHub blob requests
+        self._fetch_pool = ThreadPoolExecutor(max_workers=GITHUB_MAX_CONCURRENCY)
+        # ETag and blob SHA of each file fetched in earlier runs, for conditional requests
+        self._etags: Dict[str, List[str]] = self.load_etags()
+        self._etags_lock = threading.Lock()
         logger.info(f"Authenticated as GitHub user: {self.user.login}")
 
     def get_all_repositories(self) -> List[Repository.Repository]:
         try:
-            repos = list(self.user.get_repos())
+            repos = self.rate_limiter.call(lambda: list(self.user.get_repos()))
             logger.info(f"Found {len(repos)} repositories in user account")
             return repos
         except GithubException as e:
@@ -122,8 +362,8 @@ class GitHubRepoAnalyzer:
     def get_organization_repositories(self, org_name: str) -> List[Repository.Repository]:
         """Get repositories from a specific organization."""
         try:
-            org = self.github.get_organization(org_name)
-            repos = list(org.get_repos())
+            org = self.rate_limiter.call(self.github.get_organization, org_name)
+            repos = self.rate_limiter.call(lambda: list(org.get_repos()))
             logger.info(f"Found {len(repos)} repositories in organization {org_name}")
             return repos
         except GithubException as e:
@@ -133,7 +373,7 @@ class GitHubRepoAnalyzer:
     def get_repository_by_full_name(self, full_name: str) -> Optional[Repository.Repository]:
         """Get a specific repository by its full name (owner/repo)."""
         try:
-            repo = self.github.get_repo(full_name)
+            repo = self.rate_limiter.call(self.github.get_repo, full_name)
             logger.info(f"Found repository: {full_name}")
             return repo
         except GithubException as e:
@@ -142,42 +382,161 @@ class GitHubRepoAnalyzer:
 
     def get_repo_languages(self, repo: Repository.Repository) -> Dict[str, int]:
         try:
-            return repo.get_languages()
+            return self.rate_limiter.call(repo.get_languages)
         except GithubException as e:
             logger.error(f"Error fetching languages for {repo.name}: {e}")
             return {}
 
     def get_file_content(self, repo: Repository.Repository, file_path: str) -> Optional[str]:
+        # Serve repeated fetches of the same path from memory; None is cached for missing files
+        cache_key = (repo.full_name, file_path)
+        if cache_key in self._content_cache:
+            return self._content_cache[cache_key]
+
+        etag_key = f"{repo.full_name}:{file_path}"
+        known = self._etags.get(etag_key)
+        # Only revalidate when the body for the stored ETag is still available
+        headers = {"If-None-Match": known[0]} if known and known[1] in blob_store else None
+
         try:
-            content = repo.get_contents(file_path)
-            if isinstance(content, list):
-                return None
-            return base64.b64decode(content.content).decode('utf-8')
+            response_headers, data = self.rate_limiter.call(
+                repo._requester.requestJsonAndCheck,
+                "GET", f"{repo.url}/contents/{quote(file_path)}", headers=headers)
+            if data is None and headers:
+                # 304 Not Modified: the file is unchanged since it was last fetched
+                text = blob_store.get(known[1])
+            elif isinstance(data, list) or data.get('type') != 'file':
+                text = None
+            else:
+                if data.get('encoding') == 'base64':
+                    # Strict, like get_blob_content, since both fill the same SHA-keyed blob store
+                    text = base64.b64decode(data['content']).decode('utf-8')
+                else:
+                    # Files over 1 MB come without content; read them through the Git Data API
+                    text = self.get_blob_content(repo, data['sha'], file_path)
+                if text is not None and response_headers.get('etag'):
+                    blob_store[data['sha']] = text
+                    with self._etags_lock:
+                        self._etags[etag_key] = [response_headers['etag'], data['sha']]
+            self._content_cache[cache_key] = text
+            return text
         except GithubException as e:
-            if e.status != 404:
+            if e.status == 404:
+                self._content_cache[cache_key] = None
+            else:
                 logger.error(f"Error fetching {file_path} from {repo.name}: {e}")
             return None
+        except UnicodeDecodeError:
+            logger.warning(f"Could not decode {file_path} as UTF-8 in {repo.name}")
+            self._content_cache[cache_key] = None
+            return None
+
+    def get_blob_content(self, repo: Repository.Repository, sha: str, file_path: str) -> Optional[str]:
+        """Fetch a file by its blob SHA from the Git Data API."""
+        cache_key = (repo.full_name, file_path)
+        if cache_key in self._content_cache:
+            return self._content_cache[cache_key]
+
+        # Blobs never change, so one fetched in an earlier run can be reused as is
+        text = blob_store.get(sha)
+        if text is not None:
+            self._content_cache[cache_key] = text
+            return text
+
+        try:
+            # Read the blob JSON directly, like the tree, rather than building a PyGithub object per file
+            _, blob = self.rate_limiter.call(
+                repo._requester.requestJsonAndCheck, "GET", f"{repo.url}/git/blobs/{sha}")
+            text = base64.b64decode(blob['content']).decode('utf-8')
+            blob_store[sha] = text
+            self._content_cache[cache_key] = text
+            return text
+        except GithubException as e:
+            logger.error(f"Error fetching {file_path} from {repo.name}: {e}")
+            return None
         except UnicodeDecodeError:
             logger.warning(f"Could not decode {file_path} as UTF-8 in {repo.name}")
             return None
 
-    def get_readme_content(self, repo: Repository.Repository) -> Optional[str]:
-        for readme_name in ["README.md", "README.MD", "Readme.md", "readme.md", "README", "readme"]:
-            content = self.get_file_content(repo, readme_name)
+    def _graphql_fetch_files(self, repo: Repository.Repository,
+                             paths: List[str]) -> Optional[Tuple[Optional[str], Dict[str, Optional[str]]]]:
+        """
+        Fetch several files and the head commit of the default branch with a single GraphQL query.
+
+        Args:
+            repo: The GitHub repository to read from
+            paths: File paths relative to the repository root
+
+        Returns:
+            A tuple of the default branch's head commit SHA (None for empty repositories) and a
+            dictionary mapping each path to its text (None if missing or binary), or None if the
+            query failed and callers should fall back to REST
+        """
+        fields = " ".join(
+            f'f{i}: object(expression: {json.dumps("HEAD:" + path)}) {{ ... on Blob {{ text isBinary isTruncated }} }}'
+            for i, path in enumerate(paths)
+        )
+        query = (f"query($owner: String!, $name: String!) {{ repository(owner: $owner, name: $name) {{ "
+                 f"defaultBranchRef {{ target {{ oid }} }} {fields} }} }}")
+        owner, name = repo.full_name.split('/', 1)
+
+        try:
+            # Posts to the GraphQL endpoint of the configured host and raises if the response has errors
+            _, data = self.rate_limiter.call(
+                repo._requester.graphql_query, query, {"owner": owner, "name": name})
+        except GithubException as e:
+            logger.warning(f"GraphQL file fetch failed for {repo.name}: {e}")
+            return None
+
+        repository = (data.get('data') or {}).get('repository') or {}
+        files = {}
+        for i, path in enumerate(paths):
+            blob = repository.get(f"f{i}")
+            if blob and blob.get('isTruncated'):
+                # GraphQL cuts off large blobs; fetch the complete file over REST
+                files[path] = self.get_file_content(repo, path)
+                continue
+            files[path] = blob.get('text') if blob and not blob.get('isBinary') else None
+            self._content_cache[(repo.full_name, path)] = files[path]
+
+        head_sha = ((repository.get('defaultBranchRef') or {}).get('target') or {}).get('oid')
+        return head_sha, files
+
+    def get_readme_content(self, repo: Repository.Repository,
+                           files: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
+        for readme_name in README_NAMES:
+            content = files.get(readme_name) if files is not None else self.get_file_content(repo, readme_name)
             if content:
                 return content
         return None
 
-    def detect_frameworks(self, repo: Repository.Repository) -> Dict[str, List[str]]:
-        frameworks = {}
-        languages = self.get_repo_languages(repo)
-        frameworks["languages"] = list(languages.keys())
+    def detect_languages(self, repo: Repository.Repository,
+                         file_types: Optional[Dict[str, int]] = None) -> List[str]:
+        """List the languages of a repository, most used first, from its file extension counts if given."""
+        if file_types:
+            counts = defaultdict(int)
+            for ext, count in file_types.items():
+                language = EXTENSION_LANGUAGES.get(ext.lower())
+                if language:
+                    counts[language] += count
+            if counts:
+                return sorted(counts, key=counts.get, reverse=True)
+        # No recognizable source files; ask GitHub instead
+        return list(self.get_repo_languages(repo).keys())
+
+    def detect_frameworks(self, repo: Repository.Repository,
+                          files: Optional[Dict[str, Optional[str]]] = None,
+                          file_types: Optional[Dict[str, int]] = None) -> Dict[str, List[str]]:
+        frameworks = defaultdict(list)
+        frameworks["languages"] = self.detect_languages(repo, file_types)
 
         for file_pattern, pattern_info in FRAMEWORK_PATTERNS.items():
-            content = self.get_file_content(repo, file_pattern)
+            if files is not None:
+                content = files.get(file_pattern)
+            else:
+                content = self.get_file_content(repo, file_pattern)
             if content:
                 framework_type = pattern_info["framework"]
-                frameworks.setdefault(framework_type, [])
                 if pattern_info["type"] == "json" and "dependencies" in pattern_info:
                     try:
                         data = json.loads(content)
@@ -186,200 +545,365 @@ class GitHubRepoAnalyzer:
                     except json.JSONDecodeError:
                         logger.warning(f"Could not parse {file_pattern} as JSON in {repo.name}")
                 elif pattern_info["type"] == "text" and file_pattern == "requirements.txt":
-                    packages = [re.split(r'[=<>~]', line.strip())[0] for line in content.splitlines() if
-                                line and not line.startswith('#')]
-                    frameworks[framework_type].extend(packages)
-        return frameworks
+                    frameworks[framework_type].extend(REQ_LINE.findall(content))
+        return dict(frameworks)
 
-    def generate_fallback_summary(self, repo_data: Dict[str, Any]) -> str:
-        """Generate a simple summary when OpenAI API is unavailable."""
-        languages = ', '.join(repo_data.get('frameworks', {}).get('languages', [])) or "No languages detected"
+    def _build_summary_context(self, repo_data: Dict[str, Any]) -> SummaryContext:
+        """Prepare the strings shared by the OpenAI prompt and the fallback summary."""
+        # Check if frameworks exists and is not None
+        frameworks = repo_data.get('frameworks') or {}
 
-        # Extract frameworks
-        frameworks = repo_data.get('frameworks', {})
+        languages = ', '.join(frameworks.get('languages', [])) or "No languages detected"
         frameworks_list = []
         for framework, libraries in frameworks.items():
             if framework != 'languages' and libraries:
                 frameworks_list.append(f"{framework}: {', '.join(libraries)}")
-        frameworks_str = ', '.join(frameworks_list) or "No specific frameworks detected"
+        frameworks_str = '\n'.join(frameworks_list) or "No specific frameworks detected"
 
-        # Get a snippet of the README if available
+        # Fix for the NoneType error - ensure readme is a string before slicing
         readme = repo_data.get('readme')
+        readme_excerpt = "No README available"
         readme_snippet = "No README available"
-        if readme:
+        if readme is not None:
+            readme_excerpt = readme[:MAX_README_CHARS]
+
             # Get first paragraph or first 100 characters
-            lines = readme.split('\n')
-            non_empty_lines = [line for line in lines if line.strip()]
-            if non_empty_lines:
-                readme_snippet = non_empty_lines[0][:100] + "..." if len(non_empty_lines[0]) > 100 else non_empty_lines[
-                    0]
+            first_line = FIRST_TEXT_LINE.search(readme)
+            if first_line:
+                first_line = first_line.group(0)
+                readme_snippet = first_line[:100] + "..." if len(first_line) > 100 else first_line
 
         # Get code analysis information
         code_analysis = repo_data.get('code_analysis', {})
-        total_files = code_analysis.get('total_files', 0)
-        total_lines = code_analysis.get('total_lines', 0)
-        main_file_types = code_analysis.get('main_file_types', [])
 
-        # Create a simple JSON summary
-        fallback_json = {
+        # Get file types for better analysis
+        file_types = code_analysis.get('file_types', {})
+        file_types_str = "\n".join([f"{ext}: {count} files" for ext, count in file_types.items()]) if file_types else "No file types detected"
+
+        # Get code samples for analysis - dedented, without blank lines and capped in length to save tokens
+        code_samples = code_analysis.get('code_samples', {})
+        code_samples_text = ""
+        if code_analysis.get('total_files', 0):
+            for ext, samples in code_samples.items():
+                if samples:
+                    # Take up to 3 samples per extension for better code understanding
+                    for i, sample in enumerate(samples[:3]):
+                        # Prefer the declaration digest, which says more about the file in fewer tokens
+                        sample_text = sample.get('digest') or sample['sample']
+                        sample_text = BLANK_LINES.sub('\n', textwrap.dedent(sample_text))[:MAX_SAMPLE_CHARS]
+                        code_samples_text += f"\nSample {i+1} of {ext} code from {sample['path']}:\n```\n{sample_text}\n```\n"
+
+        # Prepare file structure overview as bare paths; directories end with '/'
+        structure_overview = code_analysis.get('structure_overview', [])
+        structure_lines = []
+        for entry in structure_overview[:MAX_PROMPT_STRUCTURE_ENTRIES]:
+            if entry.startswith("Directory: "):
+                structure_lines.append(entry[len("Directory: "):] + "/")
+            elif entry.startswith("File: "):
+                structure_lines.append(entry[len("File: "):])
+            else:
+                structure_lines.append(entry)
+        if len(structure_overview) > MAX_PROMPT_STRUCTURE_ENTRIES:
+            structure_lines.append("...")
+        structure_text = "\n".join(structure_lines)
+
+        return SummaryContext(
+            languages=languages,
+            frameworks_list=frameworks_list,
+            frameworks_str=frameworks_str,
+            readme_excerpt=readme_excerpt,
+            readme_snippet=readme_snippet,
+            file_types_str=file_types_str,
+            code_samples_text=code_samples_text,
+            structure_text=structure_text,
+            total_files=code_analysis.get('total_files', 0),
+            total_lines=code_analysis.get('total_lines', 0),
+            main_file_types=code_analysis.get('main_file_types', [])
+        )
+
+    def generate_fallback_summary(self, repo_data: Dict[str, Any], ctx: Optional[SummaryContext] = None) -> Dict[str, Any]:
+        """Generate a simple summary when OpenAI API is unavailable."""
+        if ctx is None:
+            ctx = self._build_summary_context(repo_data)
+
+        # Create a simple summary
+        return {
             "name": repo_data['name'],
             "year": repo_data['created_at'].strftime('%Y'),
-            "purpose": f"A project using {languages}. {readme_snippet}",
-            "technologies": languages.split(', '),
+            "purpose": f"A project using {ctx.languages}. {ctx.readme_snippet}",
+            "technologies": ctx.languages.split(', '),
             "features": ["Unknown"],
-            "architecture": f"Contains {total_files} files with approximately {total_lines} lines of code",
+            "architecture": f"Contains {ctx.total_files} files with approximately {ctx.total_lines} lines of code",
             "complexity": "Unknown"
         }
-        
-        return json.dumps(fallback_json, indent=2)
 
-    def summarize_with_openai(self, repo_data: Dict[str, Any]) -> str:
+    def summarize_with_openai(self, repo_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            # Check if frameworks exists and is not None
-            frameworks = repo_data.get('frameworks', {})
-            if frameworks is None:
-                frameworks = {}
-
-            languages = ', '.join(frameworks.get('languages', [])) or "No languages detected"
-            frameworks_list = []
-            for framework, libraries in frameworks.items():
-                if framework != 'languages' and libraries:
-                    frameworks_list.append(f"{framework}: {', '.join(libraries)}")
-            frameworks_str = '\n'.join(frameworks_list) or "No specific frameworks detected"
-
-            # Fix for the NoneType error - ensure readme is a string before slicing
-            readme = repo_data.get('readme')
-            if readme is None:
-                readme_excerpt = "No README available"
-            else:
-                readme_excerpt = readme[:1500]  # Increased from 1000 to get more context
-
-            # Get code analysis information
-            code_analysis = repo_data.get('code_analysis', {})
-            total_files = code_analysis.get('total_files', 0)
-            total_lines = code_analysis.get('total_lines', 0)
-            main_file_types = code_analysis.get('main_file_types', [])
-            
-            # Get file types for better analysis
-            file_types = code_analysis.get('file_types', {})
-            file_types_str = "\n".join([f"{ext}: {count} files" for ext, count in file_types.items()]) if file_types else "No file types detected"
-
-            # Get code samples for analysis - include more samples for better understanding
-            code_samples = code_analysis.get('code_samples', {})
-            code_samples_text = ""
-            for ext, samples in code_samples.items():
-                if samples:
-                    # Take up to 3 samples per extension for better code understanding
-                    for i, sample in enumerate(samples[:3]):
-                        code_samples_text += f"\nSample {i+1} of {ext} code from {sample['path']}:\n```\n{sample['sample']}\n```\n"
-
-            # Prepare file structure overview - include more files for better context
-            structure_overview = code_analysis.get('structure_overview', [])
-            structure_text = "\n".join(structure_overview[:50])  # Increased from 30 to 50 items
+            ctx = self._build_summary_context(repo_data)
 
-            prompt = f"""
-You are a technical expert analyzing a software project. Based on the following information, make definitive statements about the project's purpose, technologies, and functionality. Focus on analyzing the code, file names, and structure rather than just descriptions.
+            # Skip the API for repositories with too little information to improve on the fallback summary
+            trivial = ctx.total_files == 0 or (
+                repo_data.get('readme') is None and not ctx.frameworks_list and ctx.total_lines < 50)
+            if trivial:
+                logger.debug(f"Not enough information to summarize {repo_data['name']} with OpenAI, using fallback summary")
+                return self.generate_fallback_summary(repo_data, ctx)
 
-Project Name: {repo_data['name']}
+            # Only per-repository data goes in the user message; instructions live in SYSTEM_PROMPT
+            prompt = f"""Project Name: {repo_data['name']}
 Created On: {repo_data['created_at'].strftime('%Y-%m-%d')}
-Languages: {languages}
+Languages: {ctx.languages}
 Frameworks and Libraries:
-{frameworks_str}
+{ctx.frameworks_str}
 
 Code Analysis:
-- Total Files: {total_files}
-- Total Lines of Code: {total_lines}
-- Main File Types: {', '.join(main_file_types) if main_file_types else "None detected"}
+- Total Files: {ctx.total_files}
+- Total Lines of Code: {ctx.total_lines}
+- Main File Types: {', '.join(ctx.main_file_types) if ctx.main_file_types else "None detected"}
 
 Detailed File Types:
-{file_types_str}
+{ctx.file_types_str}
 
 File Structure Overview:
-{structure_text}
+{ctx.structure_text}
 
-{code_samples_text}
+{ctx.code_samples_text}
 
 README Excerpt:
-{readme_excerpt}
-
-Based on the code samples, file names, and project structure, provide a definitive analysis of this project. Make authoritative statements about what the project does, how it works, and its purpose. Do not use hedging language like "appears to be", "likely", "suggests", "potentially", "indicates", etc. Instead, use confident, assertive language with definitive statements.
-
-Respond with a JSON object in the following format:
-{{
-  "name": "{repo_data['name']}",
-  "year": {repo_data['created_at'].strftime('%Y')},
-  "purpose": "A definitive description of what this project does and its main purpose. Use assertive language and avoid using the word 'repository'.",
-  "technologies": ["List", "of", "key", "technologies", "used"],
-  "features": ["List", "of", "main", "features", "or", "capabilities"],
-  "architecture": "Definitive description of the project's architecture or structure",
-  "complexity": "Confident assessment of the project's technical complexity (Low, Medium, High)"
-}}
-
-Ensure your response is valid JSON. Make your purpose description detailed, specific, and assertive, focusing on what the project actually does rather than generic descriptions. Do not use hedging language - be confident and definitive in your analysis.
+{ctx.readme_excerpt}
 """
+            cache_key = hashlib.sha256(json.dumps(
+                {"model": OPENAI_MODEL, "system": SYSTEM_PROMPT, "prompt": prompt}, sort_keys=True
+            ).encode('utf-8')).hexdigest()
+            cached = self.parse_summary(summary_cache.get(cache_key))
+            if cached is not None:
+                logger.info(f"Using cached summary for {repo_data['name']}")
+                repo_data['summary_source'] = 'openai'
+                return cached
+
             try:
-                response = client.chat.completions.create(
-                    model="gpt-4-turbo",  # Using GPT-4 for better code analysis
-                    messages=[
-                        {"role": "system",
-                         "content": "You are a technical expert with deep knowledge of software development, programming languages, and system architecture. Your task is to analyze project information and provide definitive, authoritative assessments based on code analysis. Use confident, assertive language without hedging terms like 'appears to be', 'likely', 'suggests', 'potentially', 'indicates', etc. Make definitive statements about what the project is and does."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1,  # Very low temperature for more focused, assertive output
-                    max_tokens=1000,   # Increased token limit for more detailed responses
-                    response_format={"type": "json_object"}  # Ensure JSON response
-                )
-
-                # Check if response has the expected structure
-                if response is None:
-                    logger.warning(f"OpenAI response is None for {repo_data['name']}, using fallback summary")
-                    return self.generate_fallback_summary(repo_data)
-
-                if not hasattr(response, 'choices') or not response.choices:
-                    logger.warning(f"Invalid OpenAI response structure for {repo_data['name']}, using fallback summary")
-                    return self.generate_fallback_summary(repo_data)
-
-                return response.choices[0].message.content.strip()
+                for attempt in range(OPENAI_RATE_LIMIT_RETRIES + 1):
+                    try:
+                        with openai_semaphore:
+                            response = client.chat.completions.create(
+                                model=OPENAI_MODEL,
+                                messages=[
+                                    {"role": "system", "content": SYSTEM_PROMPT},
+                                    {"role": "user", "content": prompt}
+                                ],
+                                temperature=0.1,  # Very low temperature for more focused, assertive output
+                                max_tokens=600,   # Enough for the JSON answer
+                                response_format={"type": "json_object"},  # Ensure JSON response
+                                stream=True  # Receive tokens as they are generated
+                            )
+
+                            # Check if response has the expected structure
+                            if response is None:
+                                logger.warning(f"OpenAI response is None for {repo_data['name']}, using fallback summary")
+                                return self.get_stale_or_fallback_summary(repo_data, ctx)
+
+                            parts = [chunk.choices[0].delta.content or '' for chunk in response if chunk.choices]
+                        break
+                    except RateLimitError:
+                        if attempt == OPENAI_RATE_LIMIT_RETRIES:
+                            raise
+                        # Back off exponentially without holding a concurrency slot
+                        delay = 2 ** attempt
+                        logger.warning(f"OpenAI rate limit hit for {repo_data['name']}, retrying in {delay}s")
+                        time.sleep(delay)
+
+                summary = self.parse_summary(''.join(parts))
+                if summary is None:
+                    logger.warning(f"Empty or invalid OpenAI response for {repo_data['name']}, using fallback summary")
+                    return self.get_stale_or_fallback_summary(repo_data, ctx)
+
+                summary_cache[cache_key] = summary
+                # Remember the latest summary per repository for use when the API is failing
+                summary_cache[f"latest:{repo_data['full_name']}"] = summary
+                repo_data['summary_source'] = 'openai'
+                return summary
             except Exception as api_error:
                 logger.warning(f"OpenAI API error for {repo_data['name']}: {api_error}, using fallback summary")
-                return self.generate_fallback_summary(repo_data)
+                return self.get_stale_or_fallback_summary(repo_data, ctx)
 
         except Exception as e:
             logger.error(f"Error generating summary with OpenAI for {repo_data['name']}: {e}")
             return self.generate_fallback_summary(repo_data)
 
+    def get_stale_or_fallback_summary(self, repo_data: Dict[str, Any],
+                                      ctx: Optional[SummaryContext] = None) -> Dict[str, Any]:
+        """Return the last cached summary for a repository, or a fallback summary if there is none."""
+        stale = self.parse_summary(summary_cache.get(f"latest:{repo_data.get('full_name')}"))
+        if stale is not None:
+            logger.info(f"Using previously cached summary for {repo_data['name']}")
+            return stale
+        return self.generate_fallback_summary(repo_data, ctx)
+
+    def parse_summary(self, summary: Any) -> Optional[Dict[str, Any]]:
+        """Return a summary as a dict, parsing it if it is a JSON string, or None if it is not valid."""
+        if isinstance(summary, str):
+            try:
+                summary = json.loads(summary)
+            except ValueError:
+                return None
+        return summary if isinstance(summary, dict) else None
+
     def generate_json_report(self, repo_analyses: List[Dict[str, Any]],
                              output_file: str = "github_repo_analysis.json"):
         """Generate a JSON report of repository analyses."""
         # Sort repositories by creation date (newest first)
-        sorted_repos = sorted(repo_analyses, key=lambda r: r['created_at'], reverse=True)
+        sorted_repos = sorted(repo_analyses, key=operator.itemgetter('created_at'), reverse=True)
         
-        # Prepare JSON data
-        json_data = []
-        for repo in sorted_repos:
-            try:
-                # Parse the JSON summary
-                summary_json = json.loads(repo['summary'])
-                json_data.append(summary_json)
-            except json.JSONDecodeError:
-                # If the summary is not valid JSON, create a basic entry
-                json_data.append({
-                    "name": repo['name'],
-                    "year": repo['created_at'].strftime('%Y'),
-                    "purpose": "Could not parse project information",
-                    "technologies": repo['frameworks'].get('languages', []),
-                    "features": [],
-                    "architecture": "Unknown",
-                    "complexity": "Unknown"
-                })
+        # Summaries are already dicts
+        json_data = [repo['summary'] for repo in sorted_repos]
         
-        # Write the JSON file
+        # Write the JSON file in one call (json.dump would issue a write per encoded chunk)
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2)
+            f.write(json.dumps(json_data, indent=2))
         
         logger.info(f"JSON report generated: {output_file}")
 
-    def analyze_repositories(self, limit: int = None, interactive: bool = False, specific_repos: List[str] = None):
+    def _analysis_cache_path(self, full_name: str, sha: str) -> str:
+        """Path of the cached analysis of a repository at a given commit."""
+        return os.path.join(ANALYSIS_CACHE_DIR, f"{full_name.replace('/', '_')}_{sha}.json")
+
+    def load_cached_analysis(self, full_name: str, sha: str) -> Optional[Dict[str, Any]]:
+        """Load a repository analysis saved for the given commit, or None if there is none."""
+        path = self._analysis_cache_path(full_name, sha)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                repo_data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read cached analysis {path}: {e}")
+            return None
+
+        if repo_data.get('sha') != sha:
+            return None
+        repo_data['created_at'] = datetime.fromisoformat(repo_data['created_at'])
+        # Analyses cached before summaries became dicts store them as JSON strings
+        repo_data['summary'] = self.parse_summary(repo_data.get('summary'))
+        if repo_data['summary'] is None:
+            return None
+        return repo_data
+
+    def load_etags(self) -> Dict[str, List[str]]:
+        """Load the ETags saved by earlier runs, or an empty store if there are none."""
+        try:
+            with open(ETAG_STORE_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read ETag store {ETAG_STORE_PATH}: {e}")
+            return {}
+
+    def save_etags(self):
+        """Save the ETag store, replacing the file atomically."""
+        with self._etags_lock:
+            data = json.dumps(self._etags)
+        try:
+            _atomic_write(ETAG_STORE_PATH, data)
+        except OSError as e:
+            logger.warning(f"Could not write ETag store {ETAG_STORE_PATH}: {e}")
+
+    def save_cached_analysis(self, repo_data: Dict[str, Any], sha: str):
+        """Save a repository analysis for the given commit, replacing the file atomically."""
+        path = self._analysis_cache_path(repo_data['full_name'], sha)
+        data = dict(repo_data, created_at=repo_data['created_at'].isoformat(), sha=sha)
+        try:
+            _atomic_write(path, json.dumps(data))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write cached analysis {path}: {e}")
+
+    def _analyze_one(self, repo: Repository.Repository, interactive: bool = False, use_cache: bool = True,
+                     refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Analyze a single repository.
+
+        Args:
+            repo: The GitHub repository to analyze
+            interactive: If True, honor skip requests from the key listener thread
+            use_cache: If True, reuse and store analyses keyed by the default branch's head commit
+            refresh: If True, ignore cached analyses but still store new ones
+
+        Returns:
+            The repository data including its summary, or None if skipped or failed
+        """
+        try:
+            # Reset skip flag at the start of each repository
+            skip_event.clear()
+
+            logger.info(f"Analyzing repository: {repo.name}")
+            print(f"Analyzing repository: {repo.name}")
+
+            # Fetch the README and manifest candidates, and resolve the default branch, in one round trip
+            snapshot = self._graphql_fetch_files(repo, CANDIDATE_FILES)
+            head_sha, files = snapshot if snapshot else (None, None)
+
+            # Reuse the previous analysis if nothing was pushed since
+            if use_cache and not refresh and head_sha:
+                cached = self.load_cached_analysis(repo.full_name, head_sha)
+                if cached is not None:
+                    logger.info(f"Using cached analysis of {repo.name} at {head_sha[:7]}")
+                    print(f"Using cached analysis of {repo.name}")
+                    return cached
+
+            # With the snapshot the README is a dict lookup. Without it, the REST fallback fetches it
+            # while the walk runs; it doesn't wait on the fetch pool, so it can't starve the walk's blob fetches.
+            readme_future = None
+            if files is None:
+                readme_future = self._fetch_pool.submit(self.get_readme_content, repo, files)
+            else:
+                readme = self.get_readme_content(repo, files)
+
+            logger.info(f"Analyzing code content for {repo.name}")
+            code_analysis = self.analyze_code_content(repo, head_sha)
+
+            # Basic repository data
+            repo_data = {
+                'name': repo.name,
+                'full_name': repo.full_name,
+                'created_at': repo.created_at,
+                # Languages come from the walk's file extension counts, saving a languages API call
+                'frameworks': self.detect_frameworks(repo, files, code_analysis.get('file_types')),
+                'readme': readme_future.result() if readme_future else readme,
+                'code_analysis': code_analysis
+            }
+
+            # Check if skip was requested
+            if interactive and skip_event.is_set():
+                logger.info(f"Skipping repository: {repo.name}")
+                print(f"Skipping repository: {repo.name}")
+                return None
+
+            logger.info(
+                f"Found {repo_data['code_analysis']['total_files']} files with {repo_data['code_analysis']['total_lines']} lines of code in {repo.name}")
+
+            # Generate summary
+            logger.info(f"Generating summary for {repo.name}")
+            repo_data['summary'] = self.summarize_with_openai(repo_data)
+
+            # Check if skip was requested
+            if interactive and skip_event.is_set():
+                logger.info(f"Skipping repository: {repo.name}")
+                print(f"Skipping repository: {repo.name}")
+                return None
+
+            # Only cache analyses with a real OpenAI summary so fallback summaries get retried next run
+            if use_cache and head_sha and repo_data.get('summary_source') == 'openai':
+                self.save_cached_analysis(repo_data, head_sha)
+
+            logger.info(f"Completed analysis of {repo.name}")
+            print(f"Completed analysis of {repo.name}")
+            return repo_data
+
+        except Exception as e:
+            logger.error(f"Error analyzing repository {repo.name}: {e}")
+            return None
+
+    def analyze_repositories(self, limit: int = None, interactive: bool = False, specific_repos: List[str] = None,
+                             max_workers: int = 8, use_cache: bool = True, refresh: bool = False):
         """
         Analyze GitHub repositories.
 
@@ -388,9 +912,10 @@ Ensure your response is valid JSON. Make your purpose description detailed, spec
             interactive: If True, allows skipping repositories by pressing 'S' at any time.
             specific_repos: Optional list of repository names to analyze. If provided, only these repositories will be analyzed.
                            Can include full repository names (owner/repo) for repositories in organizations.
+            max_workers: Maximum number of repositories analyzed concurrently. Interactive mode always uses one.
+            use_cache: If True, reuse analyses of repositories whose default branch has not changed since the last run.
+            refresh: If True, re-analyze every repository and overwrite its cached analysis.
         """
-        global skip_current_repo
-        
         try:
             # Get repositories based on specific_repos parameter
             if specific_repos:
@@ -440,8 +965,6 @@ Ensure your response is valid JSON. Make your purpose description detailed, spec
                 logger.info(f"Limiting analysis to {limit} repositories")
                 repos = repos[:limit]
 
-            repo_analyses = []
-            
             # Start key listener thread if in interactive mode
             listener_thread = None
             if interactive:
@@ -454,58 +977,19 @@ Ensure your response is valid JSON. Make your purpose description detailed, spec
                 except Exception as e:
                     logger.warning(f"Could not start key listener thread: {e}. Interactive mode may not work properly.")
             
-            for repo in repos:
-                try:
-                    # Reset skip flag at the start of each repository
-                    with skip_lock:
-                        skip_current_repo = False
-                    
-                    logger.info(f"Analyzing repository: {repo.name}")
-                    print(f"Analyzing repository: {repo.name}")
-                    
-                    # Basic repository data
-                    repo_data = {
-                        'name': repo.name,
-                        'created_at': repo.created_at,
-                        'frameworks': self.detect_frameworks(repo),
-                        'readme': self.get_readme_content(repo)
-                    }
-                    
-                    # Check if skip was requested
-                    if interactive and skip_current_repo:
-                        logger.info(f"Skipping repository: {repo.name}")
-                        print(f"Skipping repository: {repo.name}")
-                        continue
-
-                    # Add code analysis
-                    logger.info(f"Analyzing code content for {repo.name}")
-                    repo_data['code_analysis'] = self.analyze_code_content(repo)
-                    
-                    # Check if skip was requested
-                    if interactive and skip_current_repo:
-                        logger.info(f"Skipping repository: {repo.name}")
-                        print(f"Skipping repository: {repo.name}")
-                        continue
-                    
-                    logger.info(
-                        f"Found {repo_data['code_analysis']['total_files']} files with {repo_data['code_analysis']['total_lines']} lines of code in {repo.name}")
-
-                    # Generate summary
-                    logger.info(f"Generating summary for {repo.name}")
-                    repo_data['summary'] = self.summarize_with_openai(repo_data)
-                    
-                    # Check if skip was requested
-                    if interactive and skip_current_repo:
-                        logger.info(f"Skipping repository: {repo.name}")
-                        print(f"Skipping repository: {repo.name}")
-                        continue
-                    
-                    repo_analyses.append(repo_data)
-                    logger.info(f"Completed analysis of {repo.name}")
-                    print(f"Completed analysis of {repo.name}")
-                    
-                except Exception as e:
-                    logger.error(f"Error analyzing repository {repo.name}: {e}")
+            # Analyze repositories concurrently; the work is dominated by network I/O.
+            # In interactive mode a single worker keeps "the current repository" well defined.
+            workers = 1 if interactive else max(1, max_workers)
+            repo_analyses = []
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._analyze_one, repo, interactive, use_cache, refresh) for repo in repos]
+                # Report progress as repositories finish rather than in submission order
+                for done, future in enumerate(as_completed(futures), 1):
+                    repo_data = future.result()
+                    if repo_data is not None:
+                        repo_analyses.append(repo_data)
+                    logger.info(f"Progress: {done}/{len(repos)} repositories processed")
+            self.save_etags()
 
             if repo_analyses:
                 self.generate_json_report(repo_analyses)
@@ -514,12 +998,50 @@ Ensure your response is valid JSON. Make your purpose description detailed, spec
         except Exception as e:
             logger.error(f"Error in analyze_repositories: {e}")
 
-    def analyze_code_content(self, repo: Repository.Repository) -> Dict[str, Any]:
+    def _walk_contents(self, repo: Repository.Repository, ref: str) -> List[TreeEntry]:
+        """
+        List the repository's files directory by directory with the contents API.
+
+        Args:
+            repo: The GitHub repository to walk
+            ref: Branch name or commit SHA to list
+
+        Returns:
+            Tree entries in breadth-first order, in the same shape as the Git Tree API
+        """
+        entries = []
+        file_count = 0
+        sample_candidates = defaultdict(int)  # Files per source extension that could become code samples
+        contents = deque(self.rate_limiter.call(repo.get_contents, "", ref=ref))
+        while contents:
+            # Listing further directories would not change the samples and barely change the statistics
+            if file_count >= MAX_SCANNED_FILES and all(
+                    count >= MAX_SAMPLES_PER_EXT for count in sample_candidates.values()):
+                logger.info(f"Stopped walking {repo.name} after {file_count} files; counts are partial")
+                break
+
+            file_content = contents.popleft()
+            if file_content.path.partition('/')[0] in SKIP_DIRS:
+                continue
+
+            if file_content.type == "dir":
+                entries.append(TreeEntry(file_content.path, "tree", None, file_content.sha))
+                contents.extend(self.rate_limiter.call(repo.get_contents, file_content.path, ref=ref))
+            elif file_content.type == "file":
+                entries.append(TreeEntry(file_content.path, "blob", file_content.size, file_content.sha))
+                file_count += 1
+                ext = os.path.splitext(file_content.path)[1]
+                if ext in SOURCE_EXTS and file_content.size < MAX_SAMPLE_FILE_SIZE:
+                    sample_candidates[ext] += 1
+        return entries
+
+    def analyze_code_content(self, repo: Repository.Repository, ref: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze the actual code content in the repository.
 
         Args:
             repo: The GitHub repository to analyze
+            ref: Commit SHA to analyze, already resolved by the caller. Defaults to the default branch.
 
         Returns:
             A dictionary containing code analysis results
@@ -534,86 +1056,110 @@ Ensure your response is valid JSON. Make your purpose description detailed, spec
         }
 
         try:
-            # Get the root contents
-            contents = repo.get_contents("")
-
-            # Skip certain directories and files
-            skip_dirs = ['.git', 'node_modules', 'venv', '.venv', '__pycache__', 'dist', 'build']
-            skip_extensions = ['.pyc', '.pyo', '.min.js', '.min.css', '.map', '.log', '.md']
+            # Get the full file tree of the default branch in a single request
+            ref = ref or repo.default_branch
+            # Read the raw JSON rather than building a PyGithub object per entry
+            _, git_tree = self.rate_limiter.call(
+                repo._requester.requestJsonAndCheck, "GET", f"{repo.url}/git/trees/{ref}",
+                parameters={"recursive": "1"})
+            tree = [TreeEntry(e['path'], e['type'], e.get('size'), e['sha']) for e in git_tree.get('tree', [])]
+            if git_tree.get('truncated'):
+                # Very large trees are cut off by the API; walk the directories instead
+                logger.warning(f"File tree of {repo.name} is truncated, walking directories instead")
+                tree = self._walk_contents(repo, ref)
 
             # Track file extensions and their counts
-            file_extensions = {}
-
-            # Process files recursively
-            while contents:
-                file_content = contents.pop(0)
-
+            file_extensions = Counter()
+
+            # Source files whose content will be fetched for analysis, and how many per extension
+            pending_files = []
+            queued_per_ext = defaultdict(int)
+
+            def add_to_overview(line):
+                # Limit structure overview to avoid excessive data
+                overview = code_analysis['structure_overview']
+                if len(overview) < MAX_STRUCTURE_ENTRIES:
+                    overview.append(line)
+                elif len(overview) == MAX_STRUCTURE_ENTRIES:
+                    overview.append("... (more files/directories)")
+
+            # Process every entry of the flattened tree
+            for entry in tree:
                 # Skip directories we don't want to analyze
-                if file_content.path.split('/')[0] in skip_dirs:
+                if entry.path.partition('/')[0] in SKIP_DIRS:
                     continue
 
-                if file_content.type == "dir":
+                if entry.type == "tree":
                     # Add directory to structure overview
-                    code_analysis['structure_overview'].append(f"Directory: {file_content.path}")
-                    # Get contents of this directory and add them to our list
-                    contents.extend(repo.get_contents(file_content.path))
-                else:
+                    add_to_overview(f"Directory: {entry.path}")
+                elif entry.type == "blob":
                     # It's a file
                     code_analysis['total_files'] += 1
 
                     # Get file extension
-                    _, ext = os.path.splitext(file_content.path)
+                    _, ext = os.path.splitext(entry.path)
                     if ext:
                         # Skip certain file extensions
-                        if ext in skip_extensions:
+                        if ext in SKIP_EXTS:
                             continue
 
                         # Count file extensions
-                        file_extensions[ext] = file_extensions.get(ext, 0) + 1
+                        file_extensions[ext] += 1
 
                     # Add file to structure overview
-                    code_analysis['structure_overview'].append(f"File: {file_content.path}")
-
-                    # Try to get content for code analysis (limit to certain file types and sizes)
-                    if ext in ['.py', '.js', '.java', '.c', '.cpp', '.h', '.cs', '.php', '.rb', '.go', '.ts', '.html',
-                               '.css', '.sql']:
-                        try:
-                            # Only process files smaller than 100KB to avoid timeouts
-                            if file_content.size < 100000:
-                                file_text = self.get_file_content(repo, file_content.path)
-                                if file_text:
-                                    # Count lines
-                                    lines = file_text.count('\n') + 1
-                                    code_analysis['total_lines'] += lines
-
-                                    # Store a sample of the code (first 20 lines)
-                                    sample_lines = file_text.split('\n')[:20]
-                                    if len(sample_lines) > 0:
-                                        # Only store up to 5 samples per extension to avoid excessive data
-                                        if ext not in code_analysis['code_samples'] or len(
-                                                code_analysis['code_samples'].get(ext, [])) < 5:
-                                            if ext not in code_analysis['code_samples']:
-                                                code_analysis['code_samples'][ext] = []
-                                            code_analysis['code_samples'][ext].append({
-                                                'path': file_content.path,
-                                                'sample': '\n'.join(sample_lines),
-                                                'lines': lines
-                                            })
-                        except Exception as e:
-                            logger.warning(f"Error analyzing file {file_content.path}: {e}")
+                    add_to_overview(f"File: {entry.path}")
+
+                    # Queue content for code analysis (limit to certain file types and sizes)
+                    if ext in SOURCE_EXTS:
+                        # Only process files smaller than 100KB to avoid timeouts
+                        if entry.size is not None and entry.size < MAX_SAMPLE_FILE_SIZE:
+                            if queued_per_ext[ext] < MAX_SAMPLES_PER_EXT:
+                                # Download only the files that can still become code samples
+                                queued_per_ext[ext] += 1
+                                pending_files.append((entry, ext))
+                            else:
+                                # Estimate the line count of the rest from their size
+                                code_analysis['total_lines'] += max(1, entry.size // AVG_BYTES_PER_LINE)
+
+            def fetch(entry):
+                try:
+                    return self.get_blob_content(repo, entry.sha, entry.path)
+                except Exception as e:
+                    logger.warning(f"Error analyzing file {entry.path}: {e}")
+                    return None
+
+            # Fetch the selected files concurrently, then process them in tree order
+            code_samples = defaultdict(list)
+            file_texts = self._fetch_pool.map(fetch, [entry for entry, _ in pending_files])
+            for (entry, ext), file_text in zip(pending_files, file_texts):
+                try:
+                    if file_text:
+                        # Count lines
+                        lines = file_text.count('\n') + 1
+                        code_analysis['total_lines'] += lines
+
+                        # Store a sample of the code (first 20 lines)
+                        # Bounded split so only the sampled lines are materialized
+                        sample_lines = file_text.split('\n', 20)[:20]
+                        if len(sample_lines) > 0:
+                            # At most MAX_SAMPLES_PER_EXT files per extension were queued, so each one is kept
+                            code_samples[ext].append({
+                                'path': entry.path,
+                                'sample': '\n'.join(sample_lines),
+                                'digest': make_digest(ext, file_text),
+                                'lines': lines
+                            })
+                except Exception as e:
+                    logger.warning(f"Error analyzing file {entry.path}: {e}")
+            code_analysis['code_samples'] = dict(code_samples)
 
             # Store file type statistics
-            code_analysis['file_types'] = file_extensions
+            code_analysis['file_types'] = dict(file_extensions)
 
             # Determine main file types (top 3 by count)
-            main_types = sorted(file_extensions.items(), key=lambda x: x[1], reverse=True)[:3]
+            main_types = file_extensions.most_common(3)
             code_analysis['main_file_types'] = [f"{ext} ({count} files)" for ext, count in main_types]
 
-            # Limit structure overview to avoid excessive data
-            if len(code_analysis['structure_overview']) > 50:
-                code_analysis['structure_overview'] = code_analysis['structure_overview'][:50] + [
-                    "... (more files/directories)"]
-
             return code_analysis
 
         except Exception as e:
@@ -630,6 +1176,12 @@ def main():
                         help='Enable interactive mode to skip repositories during analysis')
     parser.add_argument('--repo-file', type=str, default='repos.txt',
                         help='Path to a text file containing repository names to analyze (one per line)')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Number of repositories to analyze concurrently (default: 8)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write cached repository analyses')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-analyze all repositories and overwrite their cached analyses')
     args = parser.parse_args()
 
     if GITHUB_TOKEN:
@@ -655,7 +1207,9 @@ def main():
                 logger.error(f"Error reading repo file {args.repo_file}: {e}")
                 print(f"Error reading repo file {args.repo_file}: {e}")
 
-        analyzer.analyze_repositories(limit=args.limit, interactive=args.interactive, specific_repos=specific_repos)
+        analyzer.analyze_repositories(limit=args.limit, interactive=args.interactive, specific_repos=specific_repos,
+                                      max_workers=args.workers, use_cache=not args.no_cache,
+                                      refresh=args.refresh)
     else:
         logger.error("GitHub token not found. Please set the GITHUB_TOKEN environment variable.")
 
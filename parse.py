@@ -1,9 +1,20 @@
 import os
+import sys
 import logging
 import re
-from dotenv import load_dotenv
-from openai import OpenAI
+import heapq
+import mmap
+import textwrap
+import time
+import threading
+import json
+import hashlib
+import functools
+import diskcache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import argparse
+from dataclasses import dataclass
+from typing import List, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -12,189 +23,356 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv(dotenv_path='.env.local')
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Initialize OpenAI client (new SDK 1.0+)
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Initialize OpenAI client (new SDK 1.0+) on first use, so parsing alone doesn't import the SDK,
+# load the environment or build the client
+@functools.lru_cache(maxsize=1)
+def get_client():
+    from dotenv import load_dotenv
+    from openai import OpenAI, DefaultHttpxClient
 
+    # Load environment variables
+    load_dotenv(dotenv_path='.env.local')
 
-# Load the markdown file
-def load_markdown_file(file_path):
+    # The SDK's own HTTP client already keeps connections alive for the concurrent evaluations.
+    # Switch it to HTTP/2 when the optional h2 package is installed, keeping the SDK's limits and timeout.
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
-    except Exception as e:
-        logger.error(f"Error loading markdown file: {e}")
-        return None
+        import h2  # noqa: F401
+    except ImportError:
+        return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=DefaultHttpxClient(http2=True))
 
+# Default number of requests sent at the same time, and of projects evaluated per request
+DEFAULT_CONCURRENCY = 10
+DEFAULT_BATCH_SIZE = 8
 
-# Split the markdown file into individual project sections
-def split_projects(markdown_text):
-    projects = []
-    sections = re.split(r'##\s+', markdown_text)
-    
-    # Skip the first section (it's the title)
-    for section in sections[1:]:
-        if not section.strip():
-            continue
-            
-        lines = section.strip().split('\n')
-        if not lines:
-            continue
-            
-        # First line is the project name
-        project_name = lines[0].strip()
-        
-        # Initialize project data
-        project = {
-            'name': project_name,
-            'year': None,
-            'description': None,
-            'tags': []
-        }
-        
-        # Process remaining lines
-        description_lines = []
-        in_description = False
-        
-        for line in lines[1:]:
-            # Year line
-            if line.startswith('**') and '**' in line and not project['year']:
-                year_match = re.search(r'\*\*(\d{4})\*\*', line)
-                if year_match:
-                    project['year'] = year_match.group(1)
-            
-            # Tag line (contains backticks)
-            elif '`' in line and not line.startswith('```'):
-                tags = re.findall(r'`([^`]+)`', line)
-                project['tags'].extend(tags)
-            
-            # Description line (not empty, not year, not tags, not separator)
-            elif line.strip() and not line.startswith('**') and '`' not in line and '---' not in line:
-                description_lines.append(line.strip())
-        
-        # Join description lines
-        if description_lines:
-            project['description'] = ' '.join(description_lines).strip()
-        
-        # Add project to list if it has a name
-        if project['name']:
-            projects.append(project)
-    
-    return projects
+# Default OpenAI rate limits (gpt-3.5-turbo, tier 1), and retries when they are hit anyway
+DEFAULT_MAX_REQUESTS_PER_MINUTE = 3500
+DEFAULT_MAX_TOKENS_PER_MINUTE = 90000
+RATE_LIMIT_RETRIES = 5
 
+# Evaluation model settings; part of the cache key
+MODEL = "gpt-3.5-turbo"
+TEMPERATURE = 0.7
+MAX_TOKENS = 300
 
-# Evaluate a project using OpenAI GPT
-def evaluate_project(project):
-    prompt = f"""
+# On-disk cache of evaluations, keyed by a hash of the exact request
+EVALUATION_CACHE_DIR = os.path.expanduser(os.path.join("~", ".gh-repo-analyzer", "cache"))
+EVALUATION_CACHE_EXPIRE = 14 * 24 * 60 * 60  # 14 days
+
+
+# Open the evaluation cache on first use, so parsing alone doesn't create the directory or its database
+@functools.lru_cache(maxsize=1)
+def get_evaluation_cache():
+    return diskcache.Cache(EVALUATION_CACHE_DIR)
+
+
+# Patterns used to parse the markdown report and the evaluations, compiled once
+SECTION_HEADING = re.compile(rb'^## ', re.MULTILINE)  # Matched on the raw bytes of the report
+YEAR_TAG = re.compile(r'\*\*(\d{4})\*\*')
+BACKTICK_TAG = re.compile(r'`([^`\n]{1,200})`')  # Bounded so a stray backtick can't make it scan far
+# Evaluation prompts, filled in with str.format for each request
+SYSTEM_MESSAGE = {"role": "system", "content": "You are an expert project evaluator."}
+
+PROMPT_TEMPLATE = """
 You are an expert project evaluator. Assess the following GitHub project and rate how impressive it is on a scale of 1 (not impressive) to 10 (extremely impressive), considering technical complexity, uniqueness, and potential impact.
 
 After the rating, briefly explain why you gave that score in 2-3 sentences.
 
-Project Name: {project['name']}
-Year: {project['year']}
-Description: {project['description']}
-Technologies: {', '.join(project['tags'])}
+Project Name: {name}
+Year: {year}
+Description: {description}
+Technologies: {tags}
 
 Respond in the following format:
 Score: <number>
 Reason: <your explanation>
 """
+
+BATCH_PROMPT_TEMPLATE = """
+You are an expert project evaluator. Assess each of the following {count} GitHub projects and rate how impressive it is on a scale of 1 (not impressive) to 10 (extremely impressive), considering technical complexity, uniqueness, and potential impact.
+
+For each project, briefly explain why you gave that score in 2-3 sentences.
+
+{projects}
+Respond with a JSON object of the following form, with one entry per project:
+{{"evaluations": [{{"index": <project number>, "score": <number>, "reason": "<your explanation>"}}]}}
+"""
+
+BATCH_PROJECT_TEMPLATE = """Project {number}:
+Project Name: {name}
+Year: {year}
+Description: {description}
+Technologies: {tags}
+"""
+
+# Score and, if present, the reason that follows it, matched in a single scan
+SCORE_REASON = re.compile(r'Score:\s*(\d+(?:\.\d+)?)(?:.*?Reason:\s*(.*))?', re.DOTALL)
+
+
+# Keep requests under the per-minute request and token limits instead of bouncing off them
+class RateLimiter:
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_available = requests_per_minute
+        self.tokens_available = tokens_per_minute
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens):
+        # A single request larger than the whole budget can only wait for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self.lock:
+                # Refill both budgets for the time elapsed since the last update
+                now = time.monotonic()
+                elapsed = now - self.last_update
+                self.last_update = now
+                self.requests_available = min(self.requests_per_minute,
+                                              self.requests_available + elapsed * self.requests_per_minute / 60)
+                self.tokens_available = min(self.tokens_per_minute,
+                                            self.tokens_available + elapsed * self.tokens_per_minute / 60)
+                if self.requests_available >= 1 and self.tokens_available >= tokens:
+                    self.requests_available -= 1
+                    self.tokens_available -= tokens
+                    return
+            time.sleep(0.05)
+
+
+# Yield the project sections of the markdown file, without their "## " heading marker.
+# The file is scanned in place through mmap, so only one section at a time is decoded.
+def iter_markdown_sections(file_path):
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Each section runs from the end of its heading to the next heading, found in a single lazy pass.
+        # Everything before the first heading is the title.
+        start = None
+        for heading in SECTION_HEADING.finditer(mm):
+            if start is not None:
+                yield mm[start:heading.start()].decode('utf-8')
+            start = heading.end()
+        if start is not None:
+            yield mm[start:].decode('utf-8')
+
+
+# A project parsed from the markdown report; slots keep instances small and attribute access quick
+@dataclass
+class Project:
+    __slots__ = ('name', 'year', 'description', 'tags')
+    name: str
+    year: Optional[str]
+    description: Optional[str]
+    tags: List[str]
+
+
+# Map a function over projects or sections, in worker processes if asked to.
+# Starting the workers costs far more than parsing a typical report, so this is opt-in.
+def map_projects(func, items, processes=1):
+    if processes <= 1:
+        return list(map(func, items))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(func, items, chunksize=32))
+
+
+# Parse one project section, or return None if it has no name
+def parse_section(section):
+    # First line is the project name, the rest holds the year, description and tags
+    project_name, _, body = section.strip().partition('\n')
+    project_name = project_name.strip()
+    if not project_name:
+        return None
+
+    # Cheap substring checks skip the regex scans on sections without a year or tags
+    year_match = YEAR_TAG.search(body) if '**' in body else None
+
+    # Description lines are the ones that are not empty, not the year, not tags and not a separator
+    description = ' '.join(
+        line.strip() for line in body.split('\n')
+        if line.strip() and not line.startswith('**') and '`' not in line and '---' not in line
+    )
+
+    return Project(
+        name=project_name,
+        year=year_match.group(1) if year_match else None,
+        description=description or None,
+        tags=BACKTICK_TAG.findall(body) if '`' in body else []
+    )
+
+
+# Parse the project sections of the markdown file
+def split_projects(sections, processes=1):
+    return [project for project in map_projects(parse_section, sections, processes) if project is not None]
+
+
+# Build the single-project evaluation prompt
+def build_evaluation_prompt(project):
+    return PROMPT_TEMPLATE.format(name=project.name, year=project.year,
+                                  description=project.description, tags=', '.join(project.tags))
+
+
+# Cache key of a project's evaluation; batched evaluations are stored under the same key
+def evaluation_cache_key(project):
+    return hashlib.sha256(json.dumps(
+        {"model": MODEL, "temperature": TEMPERATURE, "max_tokens": MAX_TOKENS,
+         "prompt": build_evaluation_prompt(project)}, sort_keys=True
+    ).encode('utf-8')).hexdigest()
+
+
+# Send a chat completion, waiting for the rate limiter and retrying when the rate limit is hit
+def create_completion(prompt, max_tokens, rate_limiter=None, label="", **kwargs):
+    from openai import RateLimitError  # Imported here so parsing alone never loads the SDK
+
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        if rate_limiter:
+            # Rough estimate: about 4 characters per prompt token, plus the completion
+            rate_limiter.acquire(len(prompt) // 4 + max_tokens)
+        try:
+            response = get_client().chat.completions.create(
+                model=MODEL,
+                messages=[SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+                temperature=TEMPERATURE,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+            return response.choices[0].message.content.strip()
+        except RateLimitError:
+            if attempt == RATE_LIMIT_RETRIES:
+                raise
+            # Back off exponentially before trying again
+            delay = 2 ** attempt
+            logger.warning(f"OpenAI rate limit hit for {label}, retrying in {delay}s")
+            time.sleep(delay)
+
+
+# Evaluate a project using OpenAI GPT
+def evaluate_project(project, rate_limiter=None, use_cache=True):
+    # Logged per project, so let logging skip the formatting when INFO is disabled
+    logger.info("Evaluating project: %s...", project.name)
+    cache_key = evaluation_cache_key(project)
+    if use_cache:
+        cached = get_evaluation_cache().get(cache_key)
+        if cached is not None:
+            logger.info("Using cached evaluation for %s", project.name)
+            return cached
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert project evaluator."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        return response.choices[0].message.content.strip()
+        evaluation = create_completion(build_evaluation_prompt(project), MAX_TOKENS, rate_limiter, project.name)
+        # Only successful evaluations are cached, so errors are retried on the next run
+        if use_cache:
+            get_evaluation_cache().set(cache_key, evaluation, expire=EVALUATION_CACHE_EXPIRE)
+        return evaluation
     except Exception as e:
         logger.error(f"Error calling OpenAI API: {e}")
         return f"Error evaluating project: {str(e)}"
 
 
-# Extract score from evaluation
-def extract_score(evaluation):
-    match = re.search(r'Score:\s*(\d+(?:\.\d+)?)', evaluation)
-    if match:
-        return float(match.group(1))
-    return 0
+# Evaluate several projects with a single OpenAI request, to stay under the requests-per-minute limit
+def evaluate_project_batch(batch, rate_limiter=None, use_cache=True):
+    evaluations = [None] * len(batch)
+    cache_keys = [evaluation_cache_key(project) for project in batch]
+    if use_cache:
+        for i, cache_key in enumerate(cache_keys):
+            evaluations[i] = get_evaluation_cache().get(cache_key)
+            if evaluations[i] is not None:
+                logger.info("Using cached evaluation for %s", batch[i].name)
+    pending = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+    if not pending:
+        return evaluations
+
+    names = ', '.join(batch[i].name for i in pending)
+    logger.info("Evaluating projects: %s...", names)
+    project_blocks = '\n'.join(
+        BATCH_PROJECT_TEMPLATE.format(number=number, name=batch[i].name, year=batch[i].year,
+                                      description=batch[i].description, tags=', '.join(batch[i].tags))
+        for number, i in enumerate(pending, 1)
+    )
+    prompt = BATCH_PROMPT_TEMPLATE.format(count=len(pending), projects=project_blocks)
+    try:
+        content = create_completion(prompt, MAX_TOKENS * len(pending), rate_limiter, names,
+                                    response_format={"type": "json_object"})
+        entries = json.loads(content).get('evaluations', [])
+    except Exception as e:
+        logger.error(f"Error calling OpenAI API for batch: {e}")
+        entries = []
+
+    # Scatter the answers back to their projects, in the same format as single evaluations
+    for entry in entries:
+        try:
+            number = int(entry['index'])
+            evaluation = f"Score: {float(entry['score'])}\nReason: {str(entry['reason']).strip()}"
+        except (KeyError, TypeError, ValueError):
+            continue
+        # Drop out-of-range or repeated numbers; those projects fall back to a single evaluation
+        if not 1 <= number <= len(pending):
+            continue
+        i = pending[number - 1]
+        if evaluations[i] is not None:
+            continue
+        evaluations[i] = evaluation
+        if use_cache:
+            get_evaluation_cache().set(cache_keys[i], evaluation, expire=EVALUATION_CACHE_EXPIRE)
+
+    # Evaluate any project missing from the answer on its own
+    for i in pending:
+        if evaluations[i] is None:
+            evaluations[i] = evaluate_project(batch[i], rate_limiter, use_cache)
+    return evaluations
+
+
+# Text wrapper for cards of a given width, leaving room for the borders; shared by all cards of that width
+@functools.lru_cache(maxsize=32)
+def card_wrapper(width):
+    return textwrap.TextWrapper(width - 3, break_long_words=False, break_on_hyphens=False)
+
+
+# Word-wrap text into card lines
+def wrap_card_text(text, width):
+    lines = card_wrapper(width).wrap(' '.join(text.split()))
+    return [f"│ {line.ljust(width - 1)}│\n" for line in lines]
 
 
 # Format project as a card for display
 def format_project_card(project, score=None, reason=None):
     # Create a card-like display for the project
-    name = project['name']
-    year = project['year'] or ""
-    description = project['description'] or "No description available."
-    tags = ' '.join([f"{tag}" for tag in project['tags']])
+    name = project.name
+    year = project.year or ""
+    description = project.description or "No description available."
+    tags = ' '.join(project.tags)
     
     # Calculate width based on name length (minimum 70)
     width = max(70, len(name) + 20)
+    empty_line = "│".ljust(width + 2) + "│\n"
     
-    # Format the card
-    card = f"""
+    # Collect the card's lines and join them once at the end
+    parts = [f"""
 ┌{'─' * width}┐
 │ {name} {year.rjust(width - len(name) - 1)} │
 ├{'─' * width}┤
-"""
+"""]
     
     # Add description with word wrapping
-    desc_words = description.split()
-    current_line = "│ "
-    for word in desc_words:
-        if len(current_line + word) > width - 1:
-            card += current_line.ljust(width + 1) + "│\n"
-            current_line = "│ " + word + " "
-        else:
-            current_line += word + " "
-    if current_line != "│ ":
-        card += current_line.ljust(width + 1) + "│\n"
+    parts.extend(wrap_card_text(description, width))
     
     # Add empty line
-    card += "│".ljust(width + 2) + "│\n"
+    parts.append(empty_line)
     
     # Add tags with word wrapping if there are any
     if tags:
-        tag_words = tags.split()
-        current_line = "│ "
-        for word in tag_words:
-            if len(current_line + word) > width - 1:
-                card += current_line.ljust(width + 1) + "│\n"
-                current_line = "│ " + word + " "
-            else:
-                current_line += word + " "
-        if current_line != "│ ":
-            card += current_line.ljust(width + 1) + "│\n"
+        parts.extend(wrap_card_text(tags, width))
     
     # Add score if provided
     if score is not None:
-        card += "│".ljust(width + 2) + "│\n"
-        card += f"│ Score: {score}/10 {' ' * (width - len(str(score)) - 10)} │\n"
+        parts.append(empty_line)
+        parts.append(f"│ Score: {score}/10 {' ' * (width - len(str(score)) - 10)} │\n")
     
     # Add reason if provided
     if reason:
-        card += "│".ljust(width + 2) + "│\n"
-        reason_words = reason.split()
-        current_line = "│ "
-        for word in reason_words:
-            if len(current_line + word) > width - 1:
-                card += current_line.ljust(width + 1) + "│\n"
-                current_line = "│ " + word + " "
-            else:
-                current_line += word + " "
-        if current_line != "│ ":
-            card += current_line.ljust(width + 1) + "│\n"
+        parts.append(empty_line)
+        parts.extend(wrap_card_text(reason, width))
     
-    card += f"└{'─' * width}┘\n"
+    parts.append(f"└{'─' * width}┘\n")
     
-    return card
+    return ''.join(parts)
 
 
 # Main function to process the markdown file
@@ -206,43 +384,78 @@ def main():
                         help='Number of top projects to display (default: 10)')
     parser.add_argument('--no-evaluate', action='store_true',
                         help='Skip evaluation and just display the projects')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Worker processes for parsing and formatting; only worth it for very large reports '
+                             '(default: 1, no worker processes)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Number of evaluation requests to send at the same time (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Number of projects evaluated per request; 1 disables batching (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--max-requests-per-minute', type=int, default=DEFAULT_MAX_REQUESTS_PER_MINUTE,
+                        help=f'OpenAI requests allowed per minute (default: {DEFAULT_MAX_REQUESTS_PER_MINUTE})')
+    parser.add_argument('--max-tokens-per-minute', type=int, default=DEFAULT_MAX_TOKENS_PER_MINUTE,
+                        help=f'OpenAI tokens allowed per minute (default: {DEFAULT_MAX_TOKENS_PER_MINUTE})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Evaluate every project again instead of using cached evaluations')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='Delete all cached evaluations before running')
     args = parser.parse_args()
+
+    if args.clear_cache:
+        get_evaluation_cache().clear()
+        logger.info("Cleared cached evaluations")
     
     logger.info(f"Loading markdown file: {args.file}")
-    markdown_text = load_markdown_file(args.file)
-    if not markdown_text:
+    logger.info("Extracting projects...")
+    try:
+        projects = split_projects(iter_markdown_sections(args.file), args.processes)
+    except (OSError, ValueError) as e:
+        # ValueError covers empty files, which can't be mapped, and invalid UTF-8
+        logger.error(f"Error loading markdown file: {e}")
         logger.error("Failed to load markdown file. Exiting.")
         return
-
-    logger.info("Extracting projects...")
-    projects = split_projects(markdown_text)
     logger.info(f"Found {len(projects)} projects.")
 
     if args.no_evaluate:
         # Just display the projects without evaluation
-        print(f"\n--- My GitHub Projects ({len(projects)}) ---\n")
-        for project in projects:
-            print(format_project_card(project))
+        cards = map_projects(format_project_card, projects, args.processes)
+        # Write everything at once; print per card would write (and flush a terminal) for each one
+        sys.stdout.write(f"\n--- My GitHub Projects ({len(projects)}) ---\n\n" + ''.join(f"{card}\n" for card in cards))
     else:
         # Evaluate and display top projects
         logger.info("Evaluating projects...")
+        # The evaluations are independent API calls, so run them concurrently; map keeps the input order
+        rate_limiter = RateLimiter(args.max_requests_per_minute, args.max_tokens_per_minute)
+        use_cache = not args.no_cache
+        # Create the client and open the cache before the worker threads start, so they share a single one
+        get_client()
+        if use_cache:
+            get_evaluation_cache()
+        batch_size = max(1, args.batch_size)
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            if batch_size == 1:
+                evaluations = list(executor.map(
+                    lambda project: evaluate_project(project, rate_limiter, use_cache), projects))
+            else:
+                batches = [projects[i:i + batch_size] for i in range(0, len(projects), batch_size)]
+                evaluations = [evaluation for batch_evaluations in executor.map(
+                    lambda batch: evaluate_project_batch(batch, rate_limiter, use_cache), batches)
+                    for evaluation in batch_evaluations]
+
         results = []
-        for idx, project in enumerate(projects, 1):
-            logger.info(f"Evaluating Project {idx}: {project['name']}...")
-            evaluation = evaluate_project(project)
-            score = extract_score(evaluation)
-            reason = evaluation.split('Reason:')[1].strip() if 'Reason:' in evaluation else ''
+        for project, evaluation in zip(projects, evaluations):
+            match = SCORE_REASON.search(evaluation)
+            score = float(match.group(1)) if match else 0
+            reason = (match.group(2) or '').strip() if match else ''
             results.append((project, score, reason))
 
-        # Sort projects by score in descending order
-        sorted_results = sorted(results, key=lambda x: x[1], reverse=True)
+        # Pick the top N projects by score, in descending order, without sorting all of them
+        top_results = heapq.nlargest(args.top, results, key=lambda x: x[1])
         
         # Display top N projects
-        top_n = min(args.top, len(sorted_results))
-        print(f"\n--- Top {top_n} Most Impressive Projects ---\n")
-        
-        for i, (project, score, reason) in enumerate(sorted_results[:top_n], 1):
-            print(format_project_card(project, score, reason))
+        top_n = len(top_results)
+        sys.stdout.write(f"\n--- Top {top_n} Most Impressive Projects ---\n\n" + ''.join(
+            f"{format_project_card(project, score, reason)}\n" for project, score, reason in top_results))
 
 
 if __name__ == "__main__":